@@ -1,11 +1,19 @@
 """Provide the primary functions."""
 
+import jax
 import jax.numpy as jnp
+import jax.scipy.linalg
 import functools
-from copy import deepcopy
 from typing import Any
 import sys
 import numpy as np
+from scipy import sparse
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the CPU decimation then runs in plain numpy
+    def njit(*args, **kwargs):
+        return lambda func: func
 
 
 def matrix_decomposition(hsn_matrix: np.ndarray, block_size: int, lattice_points,
@@ -16,8 +24,8 @@ def matrix_decomposition(hsn_matrix: np.ndarray, block_size: int, lattice_points
 
     Parameters
     ----------
-    hsn_matrix: np.ndarray
-        Hessian matrix is the "read_hessian" method return
+    hsn_matrix: np.ndarray or sparse.csr_matrix
+        Hessian matrix is the "read_hessian" (dense) or "sparse_hessian" (sparse) method return
     block_indices : list
         Pointer to the block position
     block_size: int
@@ -41,16 +49,14 @@ def matrix_decomposition(hsn_matrix: np.ndarray, block_size: int, lattice_points
                     block_indices[0] + nearest_neighbor_idx[:, 0] - 1) * 2 * rep[2]
     Hsn_keys = ['H0', 'H1', 'H2', 'H3', 'H4', 'T0', 'T1', 'T2', 'T3', 'T4']
     Hsn = {}  # Return dict — decomposed Hessian matrix
-    lat = []
+    # All blocks share the rows of the onsite block — slice them once, dense blocks stay views into the Hessian
+    hsn_rows = hsn_matrix[natm_per_unitcell * 3 * elements_idx[0]:
+                          natm_per_unitcell * 3 * (elements_idx[0] + block_size)]
     for i in range(10):
-        Hsn_block = hsn_matrix[natm_per_unitcell * 3 * elements_idx[0]:
-                               natm_per_unitcell * 3 * (elements_idx[0] + block_size),
-                    natm_per_unitcell * 3 * elements_idx[i]:
-                    natm_per_unitcell * 3 * (elements_idx[i] + block_size)]
-        lat_ = lattice_points[elements_idx[i]] - lattice_points[elements_idx[0]]
-
-        Hsn[Hsn_keys[i]] = Hsn_block
-        lat.append(1e-10*lat_)
+        Hsn_block = hsn_rows[:, natm_per_unitcell * 3 * elements_idx[i]:
+                             natm_per_unitcell * 3 * (elements_idx[i] + block_size)]
+        Hsn[Hsn_keys[i]] = Hsn_block.toarray() if sparse.issparse(Hsn_block) else Hsn_block
+    lat = list(1e-10 * (lattice_points[elements_idx] - lattice_points[elements_idx[0]]))
 
     return Hsn, lat
 
@@ -72,21 +78,48 @@ def define_wavevectors(periodicity_length: float, num_kpoints: int) -> dict:
         First key includes the kpoints, and the second one includes the periodicity length
     """
 
-    kpoints_y = np.linspace(-np.sqrt(2) * np.pi / periodicity_length, np.sqrt(2) * np.pi / periodicity_length,
-                            num_kpoints,
-                            endpoint=True)
-    kpoints_x = np.linspace(-np.sqrt(2) * np.pi / periodicity_length, np.sqrt(2) * np.pi / periodicity_length,
-                            num_kpoints,
-                            endpoint=True)
+    # The grid is square, the same kpoints are used along x and y
+    kpoints_1d = np.linspace(-np.sqrt(2) * np.pi / periodicity_length, np.sqrt(2) * np.pi / periodicity_length,
+                             num_kpoints,
+                             endpoint=True)
 
-    kx_grid, ky_grid = np.meshgrid(kpoints_x, kpoints_y)
-    kpoints = np.array([ky_grid.flatten(), kx_grid.flatten()])
+    kx_grid, ky_grid = np.broadcast_arrays(kpoints_1d[None, :], kpoints_1d[:, None])
+    kpoints = np.stack([ky_grid.ravel(), kx_grid.ravel()])
     periodicity_len = periodicity_length
     dict_output = dict(kpoints=kpoints, periodicity_length=periodicity_len)
 
     return dict_output
 
 
+def _fourier_transform(planewave, hsn_onsite, hsn_hopping):
+
+    """
+    Onsite and hopping Hessian matrices in the Fourier's space for a single kpoint
+
+    Parameters
+    ----------
+    planewave: jnp.ndarray
+        Plane wave at the 10 block positions
+    hsn_onsite: jnp.ndarray
+        Stacked 'H0' to 'H4' blocks
+    hsn_hopping: jnp.ndarray
+        Stacked 'T0' to 'T4' blocks
+
+    Returns
+    ----------
+    onsite_fourier: jnp.ndarray
+        Onsite Hessian matrix in the Fourier's space
+    hopping_fourier: jnp.ndarray
+        Hopping Hessian matrix in the Fourier's space
+    """
+
+    return jnp.einsum('j,jmn->mn', planewave[:5], hsn_onsite), jnp.einsum('j,jmn->mn', planewave[5:], hsn_hopping)
+
+
+# Batched over kpoints, one compiled call for all planewaves (only used with jax_enable_x64, see hessian_fourier_form)
+_fourier_transform_batch = jax.jit(jax.vmap(_fourier_transform, in_axes=(0, None, None)))
+
+
 def hessian_fourier_form(Hsn: dict, kpoints: dict, del_r) -> dict[Any, Any]:
 
     """
@@ -102,40 +135,201 @@ def hessian_fourier_form(Hsn: dict, kpoints: dict, del_r) -> dict[Any, Any]:
         Returns
         ----------
         output-dict : dict
-            First keys are index of the kpoints, the values are 'Onsite_fourier', 'Hopping_fourier', and 'wavevector'
+            The keys are 'Onsite_fourier' and 'Hopping_fourier', stacked over the kpoints with shape
+            (number of kpoints, n, n), and 'wavevector'
         """
 
     wavevector = kpoints['kpoints']
     periodicity_length = kpoints['periodicity_length']
     # distance_vector = periodicity_length * np.array([[0, 0], [0, -1], [0, 1], [-1, 0], [1, 0]])
     distance_vector = np.array(del_r)[:, :-1]
-    unit_planewave = np.exp(-1j * (distance_vector @ wavevector).T)  # Construct a plane wave
+    # Construct a plane wave — C-contiguous (number of kpoints, 10), one contiguous row per kpoint for the vmap
+    unit_planewave = np.exp(-1j * (wavevector.T @ distance_vector.T))
 
-    def fourier_transform(planewave):
+    # Weighted sums over the blocks for all kpoints at once, shape (number of kpoints, n, n)
+    hsn_onsite = np.stack([Hsn['H0'], Hsn['H1'], Hsn['H2'], Hsn['H3'], Hsn['H4']])
+    hsn_hopping = np.stack([Hsn['T0'], Hsn['T1'], Hsn['T2'], Hsn['T3'], Hsn['T4']])
+    if jax.config.jax_enable_x64:
+        onsite_fourier, hopping_fourier = map(np.asarray, _fourier_transform_batch(unit_planewave, hsn_onsite,
+                                                                                   hsn_hopping))
+    else:  # jax would compute in complex64 — keep the transform in double precision with numpy
+        onsite_fourier = np.tensordot(unit_planewave[:, :5], hsn_onsite, axes=[[1], [0]])
+        hopping_fourier = np.tensordot(unit_planewave[:, 5:], hsn_hopping, axes=[[1], [0]])
 
-        Hsn_fourier = Hsn['H0'] * planewave[0] + Hsn['H1'] * planewave[1] \
-                      + Hsn['H2'] * planewave[2] + Hsn['H3'] * planewave[3] \
-                      + Hsn['H4'] * planewave[4]
-        Hopping_fourier = Hsn['T0'] * planewave[5] + Hsn['T1'] * planewave[6] + Hsn['T2'] * planewave[7] + \
-                          Hsn['T3'] * planewave[8] + Hsn['T4'] * planewave[9]
+    output_dict = {'Onsite_fourier': onsite_fourier, 'Hopping_fourier': hopping_fourier, 'wavevector': wavevector}
 
-        Hsn_matrix = {'Onsite_fourier': Hsn_fourier, 'Hopping_fourier': Hopping_fourier}
-        return Hsn_matrix
+    return output_dict
 
-    Hsn_matrix_fourier = map(fourier_transform, unit_planewave)
-    Hsn_keys = np.arange(np.shape(wavevector)[1])
-    output_dict = dict(zip(Hsn_keys, [*Hsn_matrix_fourier]))
 
-    for _, __ in enumerate(Hsn_keys):
+def _decimation_step(carry):
 
-        output_dict[__]['wavevector'] = wavevector[:, _]
+    """
+    One Guinea-Sancho decimation step, the body of the jax.lax.while_loop in _surface_green_kernel
+
+    Parameters
+    ----------
+    carry: tuple
+        (e, e_surface, alpha, beta, residual, tol, itr) from the previous step
+
+    Returns
+    ----------
+    carry: tuple
+        The updated (e, e_surface, alpha, beta, residual, tol, itr)
+    """
+
+    e, e_surface, alpha, beta, _, tol, itr = carry
+    # Factorize e once and solve for both right hand sides. e = omega^2 (1 + i delta_o) - H is not Hermitian (and
+    # drifts further from it as alpha, beta lose their adjoint relation), so a Hermitian solver would drop the
+    # broadening — the general LU is required
+    lu_piv = jax.scipy.linalg.lu_factor(e)
+    a_term, b_term = jnp.split(jax.scipy.linalg.lu_solve(lu_piv, jnp.concatenate([alpha, beta], axis=-1)), 2, axis=-1)
+    alpha_b = alpha @ b_term
+    e_surface = e_surface - alpha_b
+    e = e - beta @ a_term - alpha_b
+    alpha = alpha @ a_term
+    beta = beta @ b_term
+    # alpha and beta decay to zero as the decimation converges
+    residual = jnp.linalg.norm(alpha) + jnp.linalg.norm(beta)
+
+    return e, e_surface, alpha, beta, residual, tol, itr + 1
+
+
+def _decimation_cond(carry):
+
+    *_, residual, tol, itr = carry
+
+    return (residual > tol) & (itr <= 1000)
+
+
+def _surface_green_kernel(omega_val, hsn_onsite, alpha, beta, delta_o):
+
+    """
+    Decimate a single (frequency, kpoint) pair and return the surface Green's function
+
+    Parameters
+    ----------
+    omega_val: float
+        Frequency
+    hsn_onsite: jnp.ndarray
+        Onsite Hessian matrix in the Fourier's space
+    alpha: jnp.ndarray
+        Initial coupling to the next layer
+    beta: jnp.ndarray
+        Initial coupling to the previous layer
+    delta_o: float
+        Infinitesimal positive number
+
+    Returns
+    ----------
+    g_surface: jnp.ndarray
+        Surface Green's function
+    converged: bool
+        False if the decimation did not converge in 1000 iterations
+    """
+
+    e_surface = (omega_val ** 2 * (1 + 1j * delta_o) * jnp.eye(hsn_onsite.shape[-1]) - hsn_onsite).astype(
+        hsn_onsite.dtype)
+    residual = jnp.linalg.norm(alpha) + jnp.linalg.norm(beta)
+    init = (e_surface, e_surface, alpha, beta, jnp.full_like(residual, jnp.inf), residual * 1e-6, jnp.asarray(0))
+    _, e_surface, _, _, residual, tol, _ = jax.lax.while_loop(_decimation_cond, _decimation_step, init)
+
+    # Not-greater rather than less-equal, so a NaN stops the decimation instead of reporting divergence
+    return jnp.linalg.inv(e_surface), ~(residual > tol)
 
-    return output_dict
+
+# Batched over kpoints (inner vmap) and frequencies (outer vmap)
+_surface_green_vmap = jax.vmap(jax.vmap(_surface_green_kernel, in_axes=(None, 0, 0, 0, None)),
+                               in_axes=(0, None, None, None, None))
+_surface_green_batch = jax.jit(_surface_green_vmap)
+_surface_green_pmap = jax.pmap(_surface_green_vmap, in_axes=(0, None, None, None, None))
+
+
+def _surface_green_devices(omega, hsn_onsite, alpha, beta, delta_o):
+
+    """
+    Same inputs and outputs as _surface_green_batch, with the frequencies split across the local devices
+    """
+
+    num_devices = jax.local_device_count()
+    if num_devices == 1:
+        return _surface_green_batch(omega, hsn_onsite, alpha, beta, delta_o)
+
+    # Pad the frequencies to a multiple of the number of devices, one chunk per device
+    omega_chunks = np.pad(omega, (0, -len(omega) % num_devices), mode='edge').reshape(num_devices, -1)
+    g_surface, converged = _surface_green_pmap(omega_chunks, hsn_onsite, alpha, beta, delta_o)
+
+    return g_surface.reshape((-1,) + g_surface.shape[2:])[:len(omega)], \
+        converged.reshape((-1,) + converged.shape[2:])[:len(omega)]
+
+
+@njit(cache=True)
+def _decimate(e, e_surface, alpha, beta):
+
+    """
+    CPU counterpart of the jax.lax.while_loop in _surface_green_kernel, compiled with numba when it is installed
+
+    Parameters
+    ----------
+    e: np.ndarray
+        Initial bulk matrix, contiguous complex64 or complex128
+    e_surface: np.ndarray
+        Initial surface matrix, same dtype as e
+    alpha: np.ndarray
+        Initial coupling to the next layer
+    beta: np.ndarray
+        Initial coupling to the previous layer
+
+    Returns
+    ----------
+    e_surface: np.ndarray
+        Converged surface matrix
+    converged: bool
+        False if the decimation did not converge in 1000 iterations
+    """
+
+    n = e.shape[0]
+    tol = (np.linalg.norm(alpha) + np.linalg.norm(beta)) * 1e-6
+    for itr in range(1001):
+        solution = np.linalg.solve(e, np.concatenate((alpha, beta), axis=1))  # General solve, e is not Hermitian
+        a_term = np.ascontiguousarray(solution[:, :n])
+        b_term = np.ascontiguousarray(solution[:, n:])
+        alpha_b = alpha @ b_term
+        e_surface -= alpha_b
+        e -= beta @ a_term + alpha_b
+        alpha = alpha @ a_term
+        beta = beta @ b_term
+        if not np.linalg.norm(alpha) + np.linalg.norm(beta) > tol:  # A NaN also stops, as in the jax kernel
+            return e_surface, True
+
+    return e_surface, False
+
+
+def _surface_green_loop(omega, hsn_onsite, alpha, beta, delta_o):
+
+    """
+    Same inputs and outputs as _surface_green_batch, decimating one (frequency, kpoint) pair at a time with _decimate
+    """
+
+    hsn_onsite = np.ascontiguousarray(hsn_onsite)
+    alpha = np.ascontiguousarray(alpha)
+    beta = np.ascontiguousarray(beta)
+    identity = np.eye(hsn_onsite.shape[-1])
+
+    g_surface = np.empty((len(omega),) + hsn_onsite.shape, dtype=hsn_onsite.dtype)
+    converged = np.empty((len(omega), len(hsn_onsite)), dtype=bool)
+    for iter_omg, omega_val in enumerate(omega):
+        for iter_k in range(len(hsn_onsite)):
+            e_surface = (omega_val ** 2 * (1 + 1j * delta_o) * identity - hsn_onsite[iter_k]).astype(hsn_onsite.dtype)
+            e_surface, converged[iter_omg, iter_k] = _decimate(e_surface.copy(), e_surface,
+                                                               alpha[iter_k], beta[iter_k])
+            g_surface[iter_omg, iter_k] = np.linalg.inv(e_surface)
+
+    return g_surface, converged
 
 
 def surface_green_func(left_hsn_bulk: dict, right_hsn_surface: dict,
                        omega_min: float, omega_max: float, omega_num: int, number_atom_unitcell: int, block_size: int,
-                       delta_o: float = 1e-6) -> dict:
+                       delta_o: float = 1e-6, backend: str = 'jax', dtype=np.complex64) -> dict:
 
     """
     A function to compute surface Green's function
@@ -153,83 +347,57 @@ def surface_green_func(left_hsn_bulk: dict, right_hsn_surface: dict,
         omega_num: int
             Sampling the frequency
         number_atom_unitcell: int
-            Number of atoms per unit cell
+            Unused — the matrix size is taken from the Hessian blocks, kept for positional compatibility
         block_size: int
-            Block size
+            Unused — the matrix size is taken from the Hessian blocks, kept for positional compatibility
         delta_o: float
             Infinitesimal positive number
+        backend: str
+            'jax' decimates all frequencies and kpoints in one batched call (frequencies are split across the
+            devices if there are several), 'numba' loops over them on the CPU
+            (plain numpy if numba is not installed)
+        dtype: np.dtype
+            Precision of the decimation — complex64 halves the memory traffic, use complex128 for precision
+            sensitive cases. The jax backend needs jax_enable_x64 for complex128 and raises a ValueError without
+            it, the numba backend runs in complex128 either way
 
         Returns
         ----------
         output-dict : dict
-            First keys are frequencies, the values are left and right surface Green's function
+            'omega' holds the frequencies, 'left_g_surface' and 'right_g_surface' hold the surface Green's
+            functions stacked with shape (number of frequencies, number of kpoints, n, n), so index i of either
+            array belongs to omega[i]
         """
 
-    omega = np.linspace(omega_min, omega_max, omega_num, endpoint=True)  # An array of frequencies
-
-    def decimation_iteration(omega_val):
+    if backend == 'jax':
+        decimation = _surface_green_devices
+    elif backend == 'numba':
+        decimation = _surface_green_loop
+    else:
+        raise ValueError("backend must be either 'jax' or 'numba'")
+    if backend == 'jax' and np.dtype(dtype) == np.complex128 and not jax.config.jax_enable_x64:
+        raise ValueError("dtype complex128 with the jax backend requires jax_enable_x64, "
+                         "enable it or use backend='numba'")
 
-        def iteration_loop(e_surface, alpha, beta):
-
-            posterior_e_surface = deepcopy(e_surface)
-            e = deepcopy(e_surface)
-            a_term = jnp.linalg.inv(e) @ alpha
-            b_term = jnp.linalg.inv(e) @ beta
-            e_surface -= alpha @ b_term
-            e -= beta @ a_term + alpha @ b_term
-            alpha = alpha @ a_term
-            beta = beta @ b_term
-
-            itr = 0
-
-            while np.linalg.norm(abs(e_surface) - abs(posterior_e_surface)) > np.max(abs(posterior_e_surface))*1e-6:
-
-                posterior_e_surface = deepcopy(e_surface)
-                a_term = jnp.linalg.inv(e) @ alpha
-                b_term = jnp.linalg.inv(e) @ beta
-                e_surface -= alpha @ b_term
-                e -= beta @ a_term + alpha @ b_term
-                alpha = alpha @ a_term
-                beta = beta @ b_term
-                itr += 1
-                if itr > 1000:
-                    print("Error: Make sure code does not diverge:",
-                          np.linalg.norm(abs(e_surface) - abs(posterior_e_surface)), np.linalg.norm(abs(e_surface)))
-                    sys.exit()
-            print(itr)
-            return e_surface
-
-        def iter_func_right(Hsn):
-
-            e_surface = Z - Hsn['Onsite_fourier']
-            alpha = Hsn['Hopping_fourier']
-            beta = Hsn['Hopping_fourier'].conj().T
-
-            e_surf = iteration_loop(e_surface=e_surface, alpha=alpha, beta=beta)
-            gr_surf = jnp.linalg.inv(e_surf)
-            return gr_surf
-
-        def iter_func_left(Hsn):
-
-            e_surface = Z - Hsn['Onsite_fourier']
-            alpha = Hsn['Hopping_fourier'].conj().T
-            beta = Hsn['Hopping_fourier']
-            e_surf = iteration_loop(e_surface=e_surface, alpha=alpha, beta=beta)
-            gr_surf = jnp.linalg.inv(e_surf)
-            return gr_surf
+    omega = np.linspace(omega_min, omega_max, omega_num, endpoint=True)  # An array of frequencies
 
-        Z = omega_val ** 2 * (1 + 1j * delta_o) * np.eye(3 * number_atom_unitcell * block_size, k=0)
-        right_g_surf = dict(
-            map(lambda _: (_[0], iter_func_right(_[1])), right_hsn_surface.items()))
-        left_g_surf = dict(
-            map(lambda _: (_[0], iter_func_left(_[1])), left_hsn_bulk.items()))
+    # The kpoints are stacked, so all (frequency, kpoint) pairs are decimated in a single compiled call
+    right_onsite = np.asarray(right_hsn_surface['Onsite_fourier'], dtype=dtype)
+    right_hopping = np.asarray(right_hsn_surface['Hopping_fourier'], dtype=dtype)
+    left_onsite = np.asarray(left_hsn_bulk['Onsite_fourier'], dtype=dtype)
+    left_hopping = np.asarray(left_hsn_bulk['Hopping_fourier'], dtype=dtype)
 
-        g_surf = {'left_g_surface': left_g_surf, 'right_g_surface': right_g_surf}
+    right_g_surf, right_converged = decimation(omega, right_onsite, right_hopping,
+                                               right_hopping.conj().swapaxes(-1, -2), delta_o)
+    left_g_surf, left_converged = decimation(omega, left_onsite, left_hopping.conj().swapaxes(-1, -2),
+                                             left_hopping, delta_o)
 
-        return g_surf
+    if not (np.all(right_converged) and np.all(left_converged)):
+        print("Error: Make sure code does not diverge")
+        sys.exit()
 
-    surf_green_func = map(decimation_iteration, omega)
-    output_dict = dict(zip(omega, surf_green_func))
+    output_dict = {'omega': omega, 'left_g_surface': np.asarray(left_g_surf),
+                   'right_g_surface': np.asarray(right_g_surf)}
 
     return output_dict
 
@@ -264,25 +432,22 @@ def device_green_func(left_hsn_surface: dict, hsn_device: dict, surface_green: d
             Frequency and wave-vector dependent transmission coefficient
         """
 
-    def dev_green_unit(omega_val, surf_green):
-
-        left_g_surface = surf_green['left_g_surface']
-        right_g_surface = surf_green['right_g_surface']
+    def dev_green_unit(omega_val, left_g_surface, right_g_surface):
 
-        def gsurt_kpoint(left_sf_green, right_sf_green, left_hsn_surf, hsn_dev):
+        def gsurt_kpoint(left_sf_green, right_sf_green, left_hopping, dev_hopping, dev_onsite):
 
-            self_energy_left = left_hsn_surf['Hopping_fourier'].conj().T \
+            self_energy_left = left_hopping.conj().T \
                                @ left_sf_green \
-                               @ left_hsn_surf['Hopping_fourier']
+                               @ left_hopping
 
-            self_energy_right = hsn_dev['Hopping_fourier'] \
+            self_energy_right = dev_hopping \
                                 @ right_sf_green \
-                                @ hsn_dev['Hopping_fourier'].conj().T
+                                @ dev_hopping.conj().T
 
             gamma_left = 1j * (self_energy_left - self_energy_left.conj().T)
             gamma_right = 1j * (self_energy_right - self_energy_right.conj().T)
             e_ret = omega_val ** 2 * np.eye(3 * number_atom_unitcell * block_size, k=0) - \
-                        hsn_dev['Onsite_fourier'] - self_energy_left - self_energy_right
+                        dev_onsite - self_energy_left - self_energy_right
             green_ret = jnp.linalg.inv(e_ret)
             green_adv = green_ret.conj().T
             Xi = np.trace(gamma_right @ (green_ret @ (gamma_left @ green_adv)))
@@ -292,18 +457,19 @@ def device_green_func(left_hsn_surface: dict, hsn_device: dict, surface_green: d
 
             return xi_k1 + xi_k2
 
-        output = list(map(lambda w, x, y, z: (gsurt_kpoint(w[1], x[1], y[1], z[1])), left_g_surface.items(),
-                               right_g_surface.items(), left_hsn_surface.items(), hsn_device.items()))
+        output = list(map(gsurt_kpoint, left_g_surface, right_g_surface, left_hsn_surface['Hopping_fourier'],
+                          hsn_device['Hopping_fourier'], hsn_device['Onsite_fourier']))
 
         green_dev_ret = np.array(list(zip(*output))[0])
         trans_modal = np.array(list(zip(*output))[1]).real
-        trans_omega = functools.reduce(sum_transmittance_kpoint, trans_modal) / len(hsn_device)
+        trans_omega = functools.reduce(sum_transmittance_kpoint, trans_modal) / len(hsn_device['Onsite_fourier'])
 
         return green_dev_ret, trans_omega, trans_modal
 
-    transmission_func = list(map(lambda x: dev_green_unit(x[0], x[1]), surface_green.items()))
+    omega = surface_green['omega']
+    transmission_func = list(map(dev_green_unit, omega, surface_green['left_g_surface'],
+                                 surface_green['right_g_surface']))
 
-    omega = np.array(list(surface_green.keys()))
     gr_dev = np.array(list(zip(*transmission_func))[0])
     transmission = np.array(list(zip(*transmission_func))[1])
     modal_transmission = np.array(list(zip(*transmission_func))[2])
@@ -404,14 +570,11 @@ def modal_properties(left_hsn_bulk: dict, left_hsn_surf: dict,
     for iter_omg, omg in enumerate(frq):
 
         dev_gr_func = device_gfunc[iter_omg]
-        surf_gr_func = surf_gfunc[omg]
-
-        modal_transmission = map(lambda t, u, v, w, x, y, z:
-                                 (iter_func(t[1]['Hopping_fourier'], u[1], v[1]['Hopping_fourier'],
-                                            w[1]['Hopping_fourier'], x[1]['Hopping_fourier'], y, z[1], omg)),
-                                 left_hsn_bulk.items(), surf_gr_func['left_g_surface'].items(), left_hsn_surf.items(),
-                                 device_hsn.items(), right_hsn_surf.items(), dev_gr_func,
-                                 surf_gr_func['right_g_surface'].items())
+        modal_transmission = map(lambda t, u, v, w, x, y, z: iter_func(t, u, v, w, x, y, z, omg),
+                                 left_hsn_bulk['Hopping_fourier'], surf_gfunc['left_g_surface'][iter_omg],
+                                 left_hsn_surf['Hopping_fourier'], device_hsn['Hopping_fourier'],
+                                 right_hsn_surf['Hopping_fourier'], dev_gr_func,
+                                 surf_gfunc['right_g_surface'][iter_omg])
 
         output.update({omg: list(modal_transmission)})
 
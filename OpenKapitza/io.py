@@ -1,6 +1,8 @@
 """Provide the input/ output functions."""
 
 import numpy as np
+import pandas as pd
+from scipy import sparse
 
 
 def read_hessian(file_name: str) -> np.ndarray:
@@ -20,12 +22,41 @@ def read_hessian(file_name: str) -> np.ndarray:
     """
 
     amu2kg = 1.66054e-27  # Convert atomic mass unit (AMU) to meter
-    hessian_data_file = np.loadtxt(file_name, delimiter=None, skiprows=0)  # Load data
-    hess_mat = hessian_data_file
-    hessian_symmetric = (np.triu(hess_mat, k=0) + np.tril(hess_mat, k=0).T) / 2  # Remove noises
-    hessian = np.triu(hessian_symmetric) + np.triu(hessian_symmetric, k=1).T  # Hessian is symmetric
+    hessian = pd.read_csv(file_name, sep=r'\s+', header=None, skiprows=0, dtype=np.float64,
+                          engine='c').to_numpy()  # Load data
+    # Hessian is symmetric -- remove noises with (H + H^T) / 2, in place. For a file that only stores
+    # one triangle this halves the off-diagonal terms, exactly as the former triu/tril averaging did
+    hessian += hessian.T
+    hessian *= 0.5
 
-    return hessian
+    # The transpose is the same symmetric matrix — C ordered without a copy when to_numpy() returns Fortran order
+    return np.ascontiguousarray(hessian.T)
+
+
+def sparse_hessian(hessian: np.ndarray, threshold: float = 1e-10) -> sparse.csr_matrix:
+
+    """
+    A function to store the Hessian matrix in the compressed sparse row format
+
+    Parameters
+    ----------
+    hessian : np.ndarray
+        Phonon hessian matrix — the "read_hessian" method return
+    threshold : float
+        Entries smaller than threshold * max(|hessian|) are beyond the interaction cutoff and are dropped
+
+    Returns
+    ----------
+    hessian : sparse.csr_matrix
+        Phonon hessian matrix [J/m^2/amu], accepted by "matrix_decomposition" in place of the dense matrix
+    """
+
+    cutoff = threshold * max(hessian.max(), -hessian.min())  # max(|hessian|) without an N x N temporary
+    hessian_sparse = sparse.csr_matrix(hessian)
+    hessian_sparse.data[abs(hessian_sparse.data) < cutoff] = 0  # Threshold the stored entries, not a dense copy
+    hessian_sparse.eliminate_zeros()
+
+    return hessian_sparse
 
 
 def read_crystal(natm_per_unitcell: int, rep: list, skip_rows: int = 9, file_crystal: str = 'data.unwrapped') -> dict:
@@ -64,7 +95,8 @@ def read_crystal(natm_per_unitcell: int, rep: list, skip_rows: int = 9, file_cry
             np.array([float(x_max) - float(x_min), float(y_max) - float(y_min), float(z_max) - float(z_min)]) / \
             np.array([rep[0], rep[1], 2 * rep[2]]) * ang2m  # Lattice constant
 
-    crystal_points = np.loadtxt(file_crystal, delimiter=None, skiprows=skip_rows)  # Read data file
+    crystal_points = np.ascontiguousarray(pd.read_csv(file_crystal, sep=r'\s+', header=None, skiprows=skip_rows,
+                                                      dtype=np.float64, engine='c').to_numpy())  # Read data file
     lattice_points = crystal_points[::natm_per_unitcell, 2:] - crystal_points[0, 2:]  # Find lattice point
     crystal_info = {'atoms_position': crystal_points, 'lattice_points': lattice_points,
                     'lattice_constant': lattice_constant}  # Output
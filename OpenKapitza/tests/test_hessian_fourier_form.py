@@ -0,0 +1,25 @@
+import OpenKapitza as OK
+import numpy as np
+from pytest import approx
+
+
+def test_hessian_fourier_form():
+
+    rng = np.random.default_rng(0)
+    Hsn_keys = ['H0', 'H1', 'H2', 'H3', 'H4', 'T0', 'T1', 'T2', 'T3', 'T4']
+    Hsn = {key: rng.normal(size=(6, 6)) for key in Hsn_keys}
+    del_r = list(5.43e-10 * rng.integers(-1, 2, size=(10, 3)))
+    kpoints = OK.define_wavevectors(5.43e-10, 3)
+
+    actual_hsn = OK.hessian_fourier_form(Hsn, kpoints, del_r)
+
+    assert actual_hsn['Onsite_fourier'].dtype == np.complex128
+    assert actual_hsn['Hopping_fourier'].dtype == np.complex128
+    # The blocks weighted by their plane wave and summed, one kpoint at a time
+    for k, wavevector in enumerate(kpoints['kpoints'].T):
+        planewave = np.exp(-1j * (np.array(del_r)[:, :-1] @ wavevector))
+        expected_onsite = sum(Hsn[key] * planewave[i] for i, key in enumerate(Hsn_keys[:5]))
+        expected_hopping = sum(Hsn[key] * planewave[i + 5] for i, key in enumerate(Hsn_keys[5:]))
+
+        assert approx(actual_hsn['Onsite_fourier'][k], rel=1e-12, abs=1e-12) == expected_onsite
+        assert approx(actual_hsn['Hopping_fourier'][k], rel=1e-12, abs=1e-12) == expected_hopping
@@ -0,0 +1,25 @@
+import OpenKapitza as OK
+import numpy as np
+from pytest import approx
+
+
+def test_matrix_decomposition_sparse():
+
+    rep = [3, 3, 1]
+    natm_per_unitcell = 1
+    num_cells = rep[0] * rep[1] * 2 * rep[2]
+    rng = np.random.default_rng(0)
+    hessian = rng.normal(size=(3 * num_cells, 3 * num_cells))
+    hessian[abs(hessian) < 1] = 0  # Interactions beyond the cutoff
+    hessian = (hessian + hessian.T) / 2
+    lattice_points = rng.normal(size=(num_cells, 3))
+
+    expected_hsn, expected_lat = OK.matrix_decomposition(hessian, 1, lattice_points, [2, 2, 1], rep, natm_per_unitcell)
+    actual_hsn, actual_lat = OK.matrix_decomposition(OK.sparse_hessian(hessian), 1, lattice_points, [2, 2, 1], rep,
+                                                     natm_per_unitcell)
+
+    assert OK.sparse_hessian(hessian).nnz == np.count_nonzero(hessian)
+    for key in expected_hsn.keys():
+        assert isinstance(actual_hsn[key], np.ndarray)
+        assert approx(actual_hsn[key]) == expected_hsn[key]
+    assert approx(np.array(actual_lat)) == np.array(expected_lat)
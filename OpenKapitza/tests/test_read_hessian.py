@@ -0,0 +1,17 @@
+import OpenKapitza as OK
+import numpy as np
+from pytest import approx
+
+
+def test_read_hessian(tmp_path):
+
+    hessian = np.arange(16, dtype=float).reshape(4, 4)
+    file_name = tmp_path / 'hessian-mass-weighted-hessian.d'
+    np.savetxt(file_name, hessian)
+
+    actual_hessian = OK.read_hessian(str(file_name))
+    expected_hessian = (hessian + hessian.T) / 2
+
+    assert approx(actual_hessian) == expected_hessian
+    assert approx(actual_hessian) == actual_hessian.T
+    assert actual_hessian.flags['C_CONTIGUOUS']
@@ -0,0 +1,50 @@
+import OpenKapitza as OK
+import jax
+import numpy as np
+import pytest
+from pytest import approx
+
+
+# complex128 is only exercised with the numba backend, the jax backend needs jax_enable_x64 for it
+@pytest.mark.parametrize('backend, dtype, tol', [('jax', np.complex64, 1e-3), ('numba', np.complex64, 1e-3),
+                                                 ('numba', np.complex128, 1e-10)])
+def test_surface_green_func(backend, dtype, tol):
+
+    rng = np.random.default_rng(0)
+    onsite, hopping = [], []
+    for k in range(3):
+        coupling = rng.normal(size=(6, 6))
+        onsite_coupling = rng.normal(size=(6, 6))
+        spring = coupling @ coupling.T / 6
+        onsite.append(onsite_coupling @ onsite_coupling.T / 6 + 2 * spring)
+        hopping.append(-spring * np.exp(1j * rng.uniform(0, np.pi)))
+    hsn = {'Onsite_fourier': np.array(onsite, dtype=complex), 'Hopping_fourier': np.array(hopping)}
+
+    actual_surface_green = OK.surface_green_func(hsn, hsn, omega_min=0.5, omega_max=3.0, omega_num=4,
+                                                 number_atom_unitcell=2, block_size=1, backend=backend, dtype=dtype)
+
+    # The surface Green's function of a semi-infinite lead satisfies g = (Z - H - alpha g beta)^-1
+    assert approx(actual_surface_green['omega']) == np.linspace(0.5, 3.0, 4)
+    assert actual_surface_green['left_g_surface'].shape == (4, 3, 6, 6)
+    assert actual_surface_green['left_g_surface'].dtype == dtype
+    for iter_omg, omega_val in enumerate(actual_surface_green['omega']):
+        Z = omega_val ** 2 * (1 + 1j * 1e-6) * np.eye(6)
+        for k in range(3):
+            hopping = hsn['Hopping_fourier'][k]
+            left_g = np.asarray(actual_surface_green['left_g_surface'][iter_omg, k], dtype=complex)
+            right_g = np.asarray(actual_surface_green['right_g_surface'][iter_omg, k], dtype=complex)
+            expected_left_g = np.linalg.inv(Z - hsn['Onsite_fourier'][k] - hopping.conj().T @ left_g @ hopping)
+            expected_right_g = np.linalg.inv(Z - hsn['Onsite_fourier'][k] - hopping @ right_g @ hopping.conj().T)
+
+            assert approx(left_g, abs=tol * np.abs(left_g).max()) == expected_left_g
+            assert approx(right_g, abs=tol * np.abs(right_g).max()) == expected_right_g
+
+
+@pytest.mark.skipif(jax.config.jax_enable_x64, reason='complex128 is supported with jax_enable_x64')
+def test_surface_green_func_jax_complex128_without_x64():
+
+    hsn = {'Onsite_fourier': np.eye(6, dtype=complex)[None], 'Hopping_fourier': np.zeros((1, 6, 6), dtype=complex)}
+
+    with pytest.raises(ValueError):
+        OK.surface_green_func(hsn, hsn, omega_min=0.5, omega_max=3.0, omega_num=4, number_atom_unitcell=2,
+                              block_size=1, backend='jax', dtype=np.complex128)